@@ -1,4 +1,5 @@
 import argparse
+import logging
 import os
 import random
 import time
@@ -15,38 +16,45 @@ import yaml
 from insights import protocol
 from insights.protocol import QueryOutput
 from insights.api.query import TextQueryAPI
-from insights.api.get_query_axons import get_query_api_axons
 from insights.api.schema.chat import ChatMessageRequest, ChatMessageResponse, ChatMessageVariantRequest
 from neurons.validators.utils.uids import get_top_miner_uids
 from fastapi import FastAPI, Body
+from fastapi.responses import ORJSONResponse
 import uvicorn
 
 
-bt.debug()
+console = Console()
 
 class APIServer:
+    # Reward given to every miner that responds to a user query.
+    constant_reward = 0.5
+
     def set_weights(self):
         """
         Sets the validator weights to the metagraph hotkeys based on the scores it has received from the miners. The weights determine the trust and incentive level the validator assigns to miner nodes on the network.
         """
         try:
             # Check if self.scores contains any NaN values and log a warning if it does.
-            if torch.isnan(self.scores).any():
+            if bt.logging.get_level() <= logging.DEBUG and torch.isnan(self.scores).any():
                 bt.logging.warning(
                     f"Scores contain NaN values. This may be due to a lack of responses from miners, or a bug in your reward functions."
                 )
 
             # Calculate the average reward for each uid across non-zero values.
+            # Normalize on a CPU copy since the weights are processed and emitted from the CPU anyway.
+            raw_weights = self.scores.detach().to("cpu", copy=True)
             # Replace any NaN values with 0.
-            raw_weights = torch.nn.functional.normalize(self.scores, p=1, dim=0)
+            raw_weights.nan_to_num_(0.0)
+            raw_weights.div_(raw_weights.abs().sum().clamp_min(1e-12))
+            uids_cpu = self.metagraph.uids.cpu()
 
             # Process the raw weights to final_weights via subtensor limitations.
             (
                 processed_weight_uids,
                 processed_weights,
             ) = bt.utils.weight_utils.process_weights_for_netuid(
-                uids=self.metagraph.uids.to("cpu"),
-                weights=raw_weights.to("cpu"),
+                uids=uids_cpu,
+                weights=raw_weights,
                 netuid=self.config.netuid,
                 subtensor=self.subtensor,
                 metagraph=self.metagraph,
@@ -59,25 +67,24 @@ class APIServer:
             ) = bt.utils.weight_utils.convert_weights_and_uids_for_emit(
                 uids=processed_weight_uids, weights=processed_weights
             )
-            table = Table(title="All Weights")
-            table.add_column("uid", justify="right", style="cyan", no_wrap=True)
-            table.add_column("weight", style="magenta")
-            table.add_column("score", style="magenta")
-            uids_and_weights = list(
-                zip(uint_uids, uint_weights)
-                )
-            # Sort by weights descending.
-            sorted_uids_and_weights = sorted(
-                uids_and_weights, key=lambda x: x[1], reverse=True
-            )
-            for uid, weight in sorted_uids_and_weights:
-                table.add_row(
-                    str(uid),
-                    str(round(weight, 4)),
-                    str(int(self.scores[uid].item())),
-                )
-            console = Console()
-            console.print(table)
+            # Rendering every uid is only useful while debugging.
+            if bt.logging.get_level() <= logging.DEBUG:
+                table = Table(title="All Weights")
+                table.add_column("uid", justify="right", style="cyan", no_wrap=True)
+                table.add_column("weight", style="magenta")
+                table.add_column("score", style="magenta")
+                uids_np = np.asarray(uint_uids)
+                weights_np = np.asarray(uint_weights, dtype=np.int64)
+                scores_np = self.scores.detach().cpu().numpy()
+                # Sort by weights descending, equal weights keep their uid order.
+                for index in np.argsort(-weights_np, kind="stable"):
+                    uid = uids_np[index]
+                    table.add_row(
+                        str(uid),
+                        str(round(weights_np[index], 4)),
+                        str(int(scores_np[uid])),
+                    )
+                console.print(table)
 
             # Set the weights on chain via our subtensor connection.
             self.subtensor.set_weights(
@@ -110,38 +117,92 @@ class APIServer:
             return status_code == 200
         
     def get_reward(self, response: Union["bt.Synapse", Any], uid: int):
-        return 0.5
+        return self.constant_reward
         
     def update_scores(self, rewards: torch.FloatTensor, uids: List[int]):
         """Performs exponential moving average on the scores based on the rewards received from the miners."""
 
+        # Both are no-ops when the caller already passes tensors on self.device.
+        rewards = torch.as_tensor(rewards, dtype=self.scores.dtype, device=self.device)
+        uids_tensor = torch.as_tensor(uids, dtype=torch.long, device=self.device)
+
         # Check if rewards contains NaN values.
-        if torch.isnan(rewards).any():
+        if bt.logging.get_level() <= logging.DEBUG and torch.isnan(rewards).any():
             bt.logging.warning(f"NaN values detected in rewards: {rewards}")
-            # Replace any NaN values in rewards with 0.
-            rewards = torch.nan_to_num(rewards, 0)
+        # Replace any NaN values in rewards with 0, out of place since as_tensor may return the caller's tensor.
+        rewards = torch.nan_to_num(rewards, 0.0)
+
+        # Update scores with rewards produced by this step, assumes uids are mutually exclusive.
+        # Uids without a reward keep their current score, so only the rewarded entries are recomputed.
+        # shape: [ len(uids) ]
+        alpha: float = self.config.user_query_moving_average_alpha
+        updated_scores: torch.FloatTensor = self.scores.index_select(0, uids_tensor).mul_(1 - alpha).add_(rewards, alpha=alpha)
+        if bt.logging.get_level() <= logging.DEBUG:
+            bt.logging.debug(f"Scattered rewards: {rewards}")
+        # Out of place, so the scores tensor handed over by the validator is never written to.
+        # shape: [ metagraph.n ]
+        self.scores = self.scores.index_copy(0, uids_tensor, updated_scores)
+        if bt.logging.get_level() <= logging.DEBUG:
+            bt.logging.debug(f"Updated moving avg scores: {self.scores}")
+        
+    def _refresh_metagraph_cache(self):
+        """Rebuilds the axon/hotkey lookups only when the validator has synced a new metagraph."""
+        metagraph_version = (id(self.metagraph), int(self.metagraph.block), len(self.metagraph.axons))
+        if metagraph_version == self._metagraph_version:
+            return
+        self._axons_np = np.empty(len(self.metagraph.axons), dtype=object)
+        self._axons_np[:] = self.metagraph.axons
+        self._hotkeys_np = np.asarray(self.metagraph.hotkeys, dtype=object)
+        self._hotkey_to_uid = {hotkey: uid for uid, hotkey in enumerate(self.metagraph.hotkeys)}
+        self._metagraph_version = metagraph_version
+
+        # Keep excluded uids across syncs, only the size of the mask follows the metagraph.
+        if len(self._excluded_mask) != len(self.metagraph.axons):
+            new_excluded_mask = np.zeros(len(self.metagraph.axons), dtype=bool)
+            min_len = min(len(new_excluded_mask), len(self._excluded_mask))
+            new_excluded_mask[:min_len] = self._excluded_mask[:min_len]
+            self._excluded_mask = new_excluded_mask
+
+    def exclude_uids(self, uids: np.ndarray):
+        """Excludes uids from the next top miner selections."""
+        self._excluded_mask[uids] = True
+
+        # If the number of excluded_uids is bigger than top x percentage of the whole axons, format it.
+        if np.count_nonzero(self._excluded_mask) > int(self.metagraph.n * self.config.top_rate):
+            bt.logging.info(f"Excluded UID list is too long")
+            self._excluded_mask.fill(False)
+
+    def reward_responses(self, responses: List[QueryOutput], uids: np.ndarray):
+        """Rewards the miners that responded to a user query and updates their scores."""
+        if self._get_reward_is_constant:
+            self.update_scores(torch.full((len(uids),), self.constant_reward, dtype=torch.float32), uids)
+            return
+
+        rewards = [self.get_reward(response, uid) for response, uid in zip(responses, uids)]
+        # Remove None reward as they represent timeout cross validation
+        # NaN rewards are kept and zeroed by update_scores.
+        valid_rewards = np.array([reward is not None for reward in rewards], dtype=bool)
 
-        # Check if `uids` is already a tensor and clone it to avoid the warning.
-        if isinstance(uids, torch.Tensor):
-            uids_tensor = uids.clone().detach()
+        if valid_rewards.any():
+            # None becomes NaN in the float array, but those entries are masked out.
+            rewards = torch.from_numpy(np.array(rewards, dtype=np.float32)[valid_rewards])
+            self.update_scores(rewards, uids[valid_rewards])
         else:
-            uids_tensor = torch.tensor(uids).to(self.device)
+            bt.logging.info('Skipping update_scores() as no responses were valid')
 
-        # Compute forward pass rewards, assumes uids are mutually exclusive.
-        # shape: [ metagraph.n ]
-        scattered_rewards: torch.FloatTensor = self.scores.scatter(
-            0, uids_tensor, rewards
-        ).to(self.device)
-        bt.logging.debug(f"Scattered rewards: {rewards}")
+    @property
+    def excluded_uids(self) -> List[int]:
+        return np.flatnonzero(self._excluded_mask).tolist()
+
+    @property
+    def scores(self) -> torch.FloatTensor:
+        return self._scores
+
+    @scores.setter
+    def scores(self, scores: torch.FloatTensor):
+        # The validator assigns its scores on every step, so they are placed on self.device here rather than per update.
+        self._scores = scores.to(device=self.device, dtype=torch.float32)
 
-        # Update scores with rewards produced by this step.
-        # shape: [ metagraph.n ]
-        alpha: float = self.config.user_query_moving_average_alpha
-        self.scores: torch.FloatTensor = alpha * scattered_rewards + (
-            1 - alpha
-        ) * self.scores.to(self.device)
-        bt.logging.debug(f"Updated moving avg scores: {self.scores}")
-        
     def __init__(
             self,
             config: None,
@@ -156,15 +217,23 @@ class APIServer:
         subtensor and metagraph of APIs will change as the ones of validators change.
         """
         self.app = FastAPI(title="validator-api",
-                           description="The goal of validator-api is to set up how to message between Chat API and validators.")
+                           description="The goal of validator-api is to set up how to message between Chat API and validators.",
+                           default_response_class=ORJSONResponse)
         self.config = config
         self.device = self.config.neuron.device
         self.wallet = wallet
         self.text_query_api = TextQueryAPI(wallet=self.wallet)
         self.subtensor = subtensor
         self.metagraph = metagraph
-        self.excluded_uids = []
+        self._excluded_mask = np.zeros(int(self.metagraph.n), dtype=bool)
         self.scores = scores
+        # Rewards can be filled without calling get_reward per miner unless a subclass overrides it.
+        self._get_reward_is_constant = type(self).get_reward is APIServer.get_reward
+        self._axons_np = None
+        self._hotkeys_np = None
+        self._hotkey_to_uid = {}
+        self._metagraph_version = None
+        self._refresh_metagraph_cache()
 
         @self.app.post("/api/text_query", summary="POST /natural language query", tags=["validator api"])
         async def get_response(query: ChatMessageRequest = Body(...)):
@@ -202,11 +271,18 @@ class APIServer:
             }
             ```
             """
+            self._refresh_metagraph_cache()
+
             # select top miner            
-            top_miner_uids = get_top_miner_uids(self.metagraph, self.config.top_rate, self.excluded_uids)
-            bt.logging.info(f"Top miner UIDs are {top_miner_uids}")
-            top_miner_axons = await get_query_api_axons(wallet=self.wallet, metagraph=self.metagraph, uids=top_miner_uids)
-            bt.logging.info(f"Top miner axons: {top_miner_axons}")
+            # A set keeps the exclusion check in get_top_miner_uids O(1) per uid.
+            top_miner_uids = get_top_miner_uids(self.metagraph, self.config.top_rate, set(self.excluded_uids))
+            # The single int64 view of the uids reused by the rest of the handler, zero-copy for a LongTensor.
+            top_uids = np.asarray(top_miner_uids, dtype=np.int64)
+            top_miner_axons = self._axons_np[top_uids].tolist()
+            # Formatting uid tensors and axons is costly, so it only happens when debug logs are emitted.
+            if bt.logging.get_level() <= logging.DEBUG:
+                bt.logging.debug(f"Top miner UIDs are {top_miner_uids}")
+                bt.logging.debug(f"Top miner axons: {top_miner_axons}")
             
             # get miner response
             responses, blacklist_axon_ids =  await self.text_query_api(
@@ -220,41 +296,25 @@ class APIServer:
                 # TODO: I have received 0 responses due to some issues
                 return "Please try again. Can't receive any responses due to the poor network connection."
             
-            blacklist_axons = np.array(top_miner_axons)[blacklist_axon_ids]
-            blacklist_uids = np.where(np.isin(np.array(self.metagraph.axons), blacklist_axons))[0]
+            # top_miner_axons is built positionally from top_miner_uids, so axon ids map straight to uids
+            responded_mask = np.ones(len(top_uids), dtype=bool)
+            responded_mask[blacklist_axon_ids] = False
             # get responded miner uids among top miners
-            responded_uids = np.setdiff1d(np.array(top_miner_uids), blacklist_uids)
-            self.excluded_uids = np.union1d(np.array(self.excluded_uids), blacklist_uids)
-            self.excluded_uids = self.excluded_uids.astype(int).tolist()
+            responded_uids = top_uids[responded_mask]
+
+            self.exclude_uids(top_uids[~responded_mask])
 
             # Add score to miners respond to user query
-            uids = responded_uids.tolist()
-            rewards = [
-                self.get_reward(response, uid) for response, uid in zip(responses, uids)
-            ]
-            # Remove None reward as they represent timeout cross validation
-            filtered_data = [(reward, uid) for reward, uid in zip(rewards, uids) if reward is not None]
-
-            if filtered_data:
-                rewards, uids = zip(*filtered_data)
-
-                rewards = torch.FloatTensor(rewards)
-                self.update_scores(rewards, uids)
-            else:  
-                bt.logging.info('Skipping update_scores() as no responses were valid')
-
-            # If the number of excluded_uids is bigger than top x percentage of the whole axons, format it.
-            if len(self.excluded_uids) > int(self.metagraph.n * self.config.top_rate):
-                bt.logging.info(f"Excluded UID list is too long")
-                self.excluded_uids = []            
-            bt.logging.info(f"Excluded_uids are {self.excluded_uids}")
-
-            bt.logging.info(f"Responses are {responses}")
+            self.reward_responses(responses, responded_uids)
+
+            if bt.logging.get_level() <= logging.DEBUG:
+                bt.logging.debug(f"Excluded_uids are {self.excluded_uids}")
+                bt.logging.debug(f"Responses are {responses}")
             
-            selected_index = responses.index(random.choice(responses))
+            selected_index = random.randrange(len(responses))
 
             # return response and the hotkey of randomly selected miner
-            return ChatMessageResponse(text=responses[selected_index].interpreted_result, miner_id=self.metagraph.hotkeys[responded_uids[selected_index]])
+            return ChatMessageResponse(text=responses[selected_index].interpreted_result, miner_id=self._hotkeys_np[responded_uids[selected_index]])
         
         @self.app.post("api/text_query/variant", summary="POST /variation request for natual language query", tags=["validator api"])
         async def get_response_variant(query: ChatMessageVariantRequest = Body(...)):
@@ -297,9 +357,16 @@ class APIServer:
             ```
             """
             bt.logging.info(f"Miner {query.miner_id} received a variant request.")
-            
-            miner_axon = await get_query_api_axons(wallet=self.wallet, metagraph=self.metagraph, uids=query.miner_id)
-            bt.logging.info(f"Miner axon: {miner_axon}")
+            self._refresh_metagraph_cache()
+
+            # miner_id is the hotkey returned by /api/text_query
+            miner_uid = self._hotkey_to_uid.get(query.miner_id)
+            if miner_uid is None:
+                return f"Miner {query.miner_id} is not registered in the metagraph."
+
+            miner_axon = [self._axons_np[miner_uid]]
+            if bt.logging.get_level() <= logging.DEBUG:
+                bt.logging.debug(f"Miner axon: {miner_axon}")
             
             responses, blacklist_axon_ids =  await self.text_query_api(
                 axons=miner_axon,
@@ -312,15 +379,16 @@ class APIServer:
                 # TODO: I have received 0 responses due to some issues
                 return "Please try again. Can't receive any responses due to the poor network connection."
             
-            bt.logging.info(f"Variant: {responses}")
+            if bt.logging.get_level() <= logging.DEBUG:
+                bt.logging.debug(f"Variant: {responses}")
 
-            # return response and the hotkey of randomly selected miner
-            return ChatMessageResponse(text=responses[0], miner_id=query.miner_id)
+            # return response of the requested miner
+            return ChatMessageResponse(text=responses[0].interpreted_result, miner_id=query.miner_id)
                 
         @self.app.get("/", tags=["default"])
         def healthcheck():
             return datetime.utcnow()  
         
     def start(self):
-        uvicorn.run(self.app, host="0.0.0.0", port=int(self.config.api_port))
+        uvicorn.run(self.app, host="0.0.0.0", port=int(self.config.api_port), loop="uvloop", http="httptools", log_level="warning")
         
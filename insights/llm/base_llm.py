@@ -12,20 +12,20 @@ class BaseLLM(ABC):
         """
     
     @abstractmethod
-    def build_query_from_messages(self, llm_messages: List[protocol.LlmMessage]) -> Query:
+    async def build_query_from_messages(self, llm_messages: List[protocol.LlmMessage]) -> Query:
         """
         Build query synapse from natural language query
         Used by miner
         """
 
     @abstractmethod
-    def interpret_result(self, llm_messages: List[protocol.LlmMessage], result: list) -> str:
+    async def interpret_result(self, llm_messages: List[protocol.LlmMessage], result: list) -> str:
         """
         Interpret result into natural language based on user's query and structured result dict
         """
 
     @abstractmethod
-    def generate_general_response(self, llm_messages: List[protocol.LlmMessage]) -> str:
+    async def generate_general_response(self, llm_messages: List[protocol.LlmMessage]) -> str:
         """
         Generate general response based on chat history
         """
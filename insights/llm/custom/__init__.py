@@ -9,10 +9,10 @@ class CustomLLM(BaseLLM):
     def __init__(self, model_name: str) -> None:
         pass
         
-    def build_query_from_messages(self, llm_messages: List[protocol.LlmMessage]) -> Query:
+    async def build_query_from_messages(self, llm_messages: List[protocol.LlmMessage]) -> Query:
         pass
         
-    def interpret_result(self, llm_messages: List[protocol.LlmMessage], result: dict) -> str:
+    async def interpret_result(self, llm_messages: List[protocol.LlmMessage], result: dict) -> str:
         pass
         
     def generate_llm_query_from_query(self, query: Query) -> str:
@@ -1,7 +1,8 @@
 import os
-import json
 from typing import List
 
+import orjson
+
 import bittensor as bt
 
 from insights.llm.base_llm import BaseLLM
@@ -16,6 +17,18 @@ from neurons.setup_logger import setup_logger
 
 logger = setup_logger("OpenAI LLM")
 
+# The system prompts are static, so their messages are shared by every request.
+QUERY_SYSTEM_MESSAGE = SystemMessage(content=query_schema)
+GENERAL_SYSTEM_MESSAGE = SystemMessage(content=general_prompt)
+
+LLM_MESSAGE_CLASSES = {
+    protocol.LLM_MESSAGE_TYPE_USER: HumanMessage,
+}
+
+def convert_llm_messages(llm_messages: List[protocol.LlmMessage]) -> list:
+    """Converts protocol messages into langchain messages, anything not sent by the user is an AI message."""
+    return [LLM_MESSAGE_CLASSES.get(llm_message.type, AIMessage)(content=llm_message.content) for llm_message in llm_messages]
+
 class OpenAILLM(BaseLLM):
     def __init__(self) -> None:
         api_key = os.getenv("OPENAI_API_KEY") or ""
@@ -24,20 +37,12 @@ class OpenAILLM(BaseLLM):
 
         self.chat = ChatOpenAI(api_key=api_key, model="gpt-4", temperature=0)
         
-    def build_query_from_messages(self, llm_messages: List[protocol.LlmMessage]) -> Query:
-        messages = [
-            SystemMessage(
-                content=query_schema
-            ),
-        ]
-        for llm_message in llm_messages:
-            if llm_message.type == protocol.LLM_MESSAGE_TYPE_USER:
-                messages.append(HumanMessage(content=llm_message.content))
-            else:
-                messages.append(AIMessage(content=llm_message.content))
+    async def build_query_from_messages(self, llm_messages: List[protocol.LlmMessage]) -> Query:
+        messages = [QUERY_SYSTEM_MESSAGE]
+        messages.extend(convert_llm_messages(llm_messages))
         try:
-            ai_message = self.chat.invoke(messages)
-            query = json.loads(ai_message.content)
+            ai_message = await self.chat.ainvoke(messages)
+            query = orjson.loads(ai_message.content)
             return Query(
                 network=NETWORK_BITCOIN,
                 type=query["type"] if "type" in query else None,
@@ -50,39 +55,27 @@ class OpenAILLM(BaseLLM):
             bt.logging.error(f"LlmQuery build error: {e}")
             raise Exception(protocol.LLM_ERROR_QUERY_BUILD_FAILED)
         
-    def interpret_result(self, llm_messages: str, result: list) -> str:
+    async def interpret_result(self, llm_messages: str, result: list) -> str:
         messages = [
             SystemMessage(
                 content=interpret_prompt.format(result=result)
             ),
         ]
-        for llm_message in llm_messages:
-            if llm_message.type == protocol.LLM_MESSAGE_TYPE_USER:
-                messages.append(HumanMessage(content=llm_message.content))
-            else:
-                messages.append(AIMessage(content=llm_message.content))
+        messages.extend(convert_llm_messages(llm_messages))
         
         try:
-            ai_message = self.chat.invoke(messages)
+            ai_message = await self.chat.ainvoke(messages)
             return ai_message.content
         except Exception as e:
             bt.logging.error(f"LlmQuery interpret result error: {e}")
             raise Exception(protocol.LLM_ERROR_INTERPRETION_FAILED)
         
-    def generate_general_response(self, llm_messages: List[protocol.LlmMessage]) -> str:
-        messages = [
-            SystemMessage(
-                content=general_prompt
-            ),
-        ]
-        for llm_message in llm_messages:
-            if llm_message.type == protocol.LLM_MESSAGE_TYPE_USER:
-                messages.append(HumanMessage(content=llm_message.content))
-            else:
-                messages.append(AIMessage(content=llm_message.content))
+    async def generate_general_response(self, llm_messages: List[protocol.LlmMessage]) -> str:
+        messages = [GENERAL_SYSTEM_MESSAGE]
+        messages.extend(convert_llm_messages(llm_messages))
                 
         try:
-            ai_message = self.chat.invoke(messages)
+            ai_message = await self.chat.ainvoke(messages)
             if ai_message == "not applicable questions":
                 raise Exception(protocol.LLM_ERROR_NOT_APPLICAPLE_QUESTIONS)
             else:
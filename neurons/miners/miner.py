@@ -206,11 +206,11 @@ class Miner(BaseMinerNeuron):
 
         try:
             # TODO: handle llm query
-            query = self.llm.build_query_from_messages(synapse.messages)
+            query = await self.llm.build_query_from_messages(synapse.messages)
             bt.logging.info(f"extracted query: {query}")
             
             result = self.graph_search.execute_query(query=query)
-            interpreted_result = self.llm.interpret_result(llm_messages=synapse.messages, result=result)
+            interpreted_result = await self.llm.interpret_result(llm_messages=synapse.messages, result=result)
 
             synapse.output = QueryOutput(result=result, interpreted_result=interpreted_result)
 
@@ -220,7 +220,7 @@ class Miner(BaseMinerNeuron):
             if error_code == protocol.LLM_ERROR_TYPE_NOT_SUPPORTED:
                 # handle unsupported query templates
                 try:
-                    interpreted_result = self.llm.generate_general_response(llm_messages=synapse.messages)
+                    interpreted_result = await self.llm.generate_general_response(llm_messages=synapse.messages)
                     synapse.output = QueryOutput(error=error_code, interpreted_result=interpreted_result)
                 except Exception as e:
                     error_code = e.args[0]
@@ -0,0 +1,91 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import torch
+
+from insights.api.insight_api import APIServer
+
+
+def create_metagraph(n: int, block: int = 1):
+    return SimpleNamespace(
+        n=torch.tensor(n),
+        block=torch.tensor(block),
+        axons=[f"axon-{uid}" for uid in range(n)],
+        hotkeys=[f"hotkey-{uid}" for uid in range(n)],
+    )
+
+
+class TestAPIServer(unittest.TestCase):
+    def setUp(self):
+        self.config = SimpleNamespace(
+            neuron=SimpleNamespace(device="cpu"),
+            top_rate=0.5,
+            user_query_moving_average_alpha=0.1,
+        )
+        self.validator_scores = torch.rand(8)
+        self.api_server = self.create_api_server(APIServer)
+
+    def create_api_server(self, api_server_class):
+        with patch("insights.api.insight_api.TextQueryAPI"):
+            return api_server_class(
+                config=self.config,
+                wallet=None,
+                subtensor=None,
+                metagraph=create_metagraph(8),
+                scores=self.validator_scores,
+            )
+
+    def test_update_scores(self):
+        original_scores = self.validator_scores.clone()
+        rewards = torch.FloatTensor([0.5, 1.0, 0.0])
+        uids = [1, 4, 6]
+
+        self.api_server.update_scores(rewards, uids)
+
+        alpha = self.config.user_query_moving_average_alpha
+        expected_scores = alpha * original_scores.scatter(0, torch.tensor(uids), rewards) + (1 - alpha) * original_scores
+        self.assertTrue(torch.allclose(self.api_server.scores, expected_scores))
+
+        # Unrewarded uids are left untouched and the validator's tensor is not written to.
+        unrewarded_uids = [0, 2, 3, 5, 7]
+        self.assertTrue(torch.equal(self.api_server.scores[unrewarded_uids], original_scores[unrewarded_uids]))
+        self.assertTrue(torch.equal(self.validator_scores, original_scores))
+
+    def test_excluded_uids_survive_resize(self):
+        self.api_server.exclude_uids(np.array([1, 2]))
+        self.assertEqual(self.api_server.excluded_uids, [1, 2])
+
+        self.api_server.metagraph = create_metagraph(10, block=2)
+        self.api_server._refresh_metagraph_cache()
+
+        self.assertEqual(len(self.api_server._excluded_mask), 10)
+        self.assertEqual(self.api_server.excluded_uids, [1, 2])
+
+    def test_excluded_uids_cleared_when_too_long(self):
+        # top_rate 0.5 of 8 uids allows 4 excluded uids.
+        self.api_server.exclude_uids(np.array([1, 2, 3, 4]))
+        self.assertEqual(self.api_server.excluded_uids, [1, 2, 3, 4])
+
+        self.api_server.exclude_uids(np.array([5]))
+        self.assertEqual(self.api_server.excluded_uids, [])
+
+    def test_reward_responses_filters_none_rewards(self):
+        class TimeoutAPIServer(APIServer):
+            def get_reward(self, response, uid):
+                return None if uid == 2 else 1.0
+
+        api_server = self.create_api_server(TimeoutAPIServer)
+        original_scores = api_server.scores.clone()
+
+        api_server.reward_responses(["response-1", "response-2", "response-3"], np.array([1, 2, 3]))
+
+        alpha = self.config.user_query_moving_average_alpha
+        self.assertEqual(api_server.scores[2], original_scores[2])
+        for uid in [1, 3]:
+            self.assertAlmostEqual(api_server.scores[uid].item(), (alpha + (1 - alpha) * original_scores[uid]).item(), places=6)
+
+
+if __name__ == '__main__':
+    unittest.main()